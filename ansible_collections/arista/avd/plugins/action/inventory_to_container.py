@@ -5,6 +5,8 @@ from __future__ import absolute_import, division, print_function
 
 __metaclass__ = type
 
+import json
+
 import yaml
 from ansible.errors import AnsibleActionFail
 from ansible.inventory.group import Group
@@ -51,7 +53,10 @@ class ActionModule(ActionBase):
             file_data = {key: result[key] for key in file_data_keys if key in result}
 
             with open(destination, "w", encoding="utf8") as file:
-                yaml.dump(file_data, file, Dumper=AnsibleDumper)
+                if destination.endswith(".json"):
+                    json.dump(file_data, file, indent=2)
+                else:
+                    yaml.dump(file_data, file, Dumper=AnsibleDumper)
 
         return result
 
@@ -36,7 +36,7 @@ options:
     default: 'AVD'
     type: str
   destination:
-    description: Optional path to save variable.
+    description: Optional path to save variable. The file is written as JSON if the path ends with `.json`, otherwise as YAML.
     required: false
     type: str
   device_filter:
@@ -78,25 +78,23 @@ EXAMPLES = r"""
     save_topology: true
 """
 
-import glob
 import os
 import traceback
+from itertools import chain
+from pathlib import Path
 
 from ansible.module_utils.basic import AnsibleModule
 from ansible.module_utils.errors import AnsibleValidationError
 
-TREELIB_IMP_ERR = None
-try:
-    from treelib import Tree
-
-    HAS_TREELIB = True
-except ImportError:
-    HAS_TREELIB = False
-    TREELIB_IMP_ERR = traceback.format_exc()
 YAML_IMP_ERR = None
 try:
     import yaml
 
+    try:
+        from yaml import CSafeLoader as SafeLoader
+    except ImportError:
+        from yaml import SafeLoader
+
     HAS_YAML = True
 except ImportError:
     HAS_YAML = False
@@ -136,46 +134,6 @@ def is_in_filter(hostname_filter=None, hostname="eos"):
     return False
 
 
-def isIterable(testing_object=None):
-    """
-    Test if an object is iterable or not.
-
-    Test if an object is iterable or not. If yes return True, else return False.
-
-    Parameters
-    ----------
-    testing_object : any, optional
-        Object to test if it is iterable or not, by default None
-    """
-    try:
-        iter(testing_object)  # noqa
-        return True
-    except TypeError:
-        return False
-
-
-def isLeaf(tree, nid):
-    """
-    Test if NodeID is a leaf with no nid attached to it.
-
-    Parameters
-    ----------
-    tree : treelib.Tree
-        Tree where NID is defined.
-    nid : treelib.Node
-        NodeID to test.
-
-    Returns
-    -------
-    boolean
-        True if node is a leaf, false in other situation
-    """
-    if nid and len(tree.is_branch(nid)) == 0:
-        return True
-    else:
-        return False
-
-
 def get_configlet(src_folder="", prefix="AVD", extension="cfg", device_filter=None):
     """
     Get available configlets to deploy to CVP.
@@ -200,18 +158,21 @@ def get_configlet(src_folder="", prefix="AVD", extension="cfg", device_filter=No
     if device_filter is None:
         device_filter = ["all"]
 
-    src_configlets = glob.glob(src_folder + "/*." + extension)
     configlets = {}
-    for file in src_configlets:
-        # Build structure only if configlet match device_filter.
-        if is_in_filter(hostname=os.path.splitext(os.path.basename(file))[0], hostname_filter=device_filter):
-            if prefix != "none":
-                name = prefix + "_" + os.path.splitext(os.path.basename(file))[0]
-            else:
-                name = os.path.splitext(os.path.basename(file))[0]
-            with open(file, "r", encoding="utf8") as file:
-                data = file.read()
-            configlets[name] = data
+    if not os.path.isdir(src_folder):
+        return configlets
+
+    dot_extension = "." + extension
+    with os.scandir(src_folder) as entries:
+        for entry in entries:
+            # Same selection as glob "*.<extension>": skip hidden files and anything not a regular file.
+            if entry.name.startswith(".") or not entry.name.endswith(dot_extension) or not entry.is_file():
+                continue
+            hostname = entry.name[: -len(dot_extension)]
+            # Build structure only if configlet match device_filter.
+            if is_in_filter(hostname=hostname, hostname_filter=device_filter):
+                name = f"{prefix}_{hostname}" if prefix != "none" else hostname
+                configlets[name] = Path(entry.path).read_text(encoding="utf8")
     return configlets
 
 
@@ -234,55 +195,94 @@ def get_device_option_value(device_data_dict, option_name):
     string
         Value set for variable, else None
     """
-    if isIterable(device_data_dict):
+    if isinstance(device_data_dict, dict):
         for option in device_data_dict:
             if option_name == option:
                 return device_data_dict[option]
         return None
 
 
-def serialize_yaml_inventory_data(dict_inventory, parent_container=None, tree_topology=None):
+def serialize_yaml_inventory_data(dict_inventory):
     """
-    Build a tree topology from YAML inventory file content.
+    Build a container topology from YAML inventory file content.
+
+    The topology is rooted at the CloudVision root container and returned as two
+    mappings describing the edges of the tree in both directions.
 
     Parameters
     ----------
     dict_inventory : dict
         Inventory YAML content.
-    parent_container : str, optional
-        Registration of container N-1 for recursive function, by default None
-    tree_topology : treelib.Tree, optional
-        Tree topology built over iteration, by default None
 
     Returns
     -------
-    treelib.Tree
-        complete container tree topology.
+    tuple
+        parent_of: dict mapping each container to its parent container.
+        children_of: dict mapping each container to the list of its child containers.
     """
-    if isIterable(dict_inventory):
-        # Working with ROOT container for Fabric
-        if tree_topology is None:
-            # initiate tree topology and add ROOT under Tenant
-            tree_topology = Tree()
-            tree_topology.create_node("Tenant", "Tenant")
-            parent_container = "Tenant"
-
-        # Recursive Inventory read
-        for k1, v1 in dict_inventory.items():
-            # Read a leaf
-            if isIterable(v1) and "children" not in v1:
-                tree_topology.create_node(k1, k1, parent=parent_container)
+    if not isinstance(dict_inventory, dict):
+        return None
+
+    parent_of = {}
+    children_of = {}
+
+    def add_container(container, parent_container):
+        parent_of[container] = parent_container
+        children_of.setdefault(parent_container, []).append(container)
+
+    # Inventory read starting with ROOT container for Fabric
+    stack = [(CVP_ROOT_CONTAINER, dict_inventory)]
+    while stack:
+        parent_container, inventory = stack.pop()
+        if not isinstance(inventory, dict):
+            continue
+
+        for k1, v1 in inventory.items():
+            if not isinstance(v1, dict):
+                continue
+            add_container(k1, parent_container)
             # If subgroup has kids
-            if isIterable(v1) and "children" in v1:
-                tree_topology.create_node(k1, k1, parent=parent_container)
-                serialize_yaml_inventory_data(dict_inventory=v1["children"], parent_container=k1, tree_topology=tree_topology)
-            elif k1 == "children" and isIterable(v1):
+            if "children" in v1:
+                stack.append((k1, v1["children"]))
+            elif k1 == "children":
                 # Extract sub-group information
                 for k2, v2 in v1.items():
                     # Add subgroup to tree
-                    tree_topology.create_node(k2, k2, parent=parent_container)
-                    serialize_yaml_inventory_data(dict_inventory=v2, parent_container=k2, tree_topology=tree_topology)
-        return tree_topology
+                    add_container(k2, parent_container)
+                    stack.append((k2, v2))
+    return parent_of, children_of
+
+
+def iter_inventory_groups(dict_inventory):
+    """
+    Iterate over the groups of an inventory, depth-first and in file order.
+
+    Parameters
+    ----------
+    dict_inventory : dict
+        Inventory YAML content.
+
+    Yields
+    ------
+    tuple
+        Group name and group content.
+    """
+    # Stack of iterators over the group levels being read, so the walk resumes where it left off.
+    stack = [iter(dict_inventory.items())]
+    while stack:
+        for k1, v1 in stack[-1]:
+            yield k1, v1
+            # If subgroup has kids
+            if isinstance(v1, dict) and "children" in v1:
+                if isinstance(v1["children"], dict):
+                    stack.append(iter(v1["children"].items()))
+                    break
+            elif k1 == "children" and isinstance(v1, dict):
+                # Extract sub-group information
+                stack.append(chain.from_iterable(v2.items() for v2 in v1.values() if isinstance(v2, dict)))
+                break
+        else:
+            stack.pop()
 
 
 def get_devices(dict_inventory, search_container=None, devices=None, device_filter=None):
@@ -308,28 +308,49 @@ def get_devices(dict_inventory, search_container=None, devices=None, device_filt
     # W102 Workaround to avoid list as default value.
     if device_filter is None:
         device_filter = ["all"]
-    if dict_inventory is None:
+    if not isinstance(dict_inventory, dict):
         return devices
 
-    for k1, v1 in dict_inventory.items():
-        # Read a leaf
-        if k1 == search_container and isIterable(v1) and "hosts" in v1:
+    for k1, v1 in iter_inventory_groups(dict_inventory):
+        # Read a leaf. Groups with empty or malformed hosts have no devices.
+        if k1 == search_container and isinstance(v1, dict) and isinstance(v1.get("hosts"), dict):
             for dev, data in v1["hosts"].items():
                 if (
                     is_in_filter(hostname_filter=device_filter, hostname=dev)
                     and get_device_option_value(device_data_dict=data, option_name="is_deployed") is not False
                 ):
                     devices.append(dev)
-        # If subgroup has kids
-        if isIterable(v1) and "children" in v1:
-            get_devices(dict_inventory=v1["children"], search_container=search_container, devices=devices, device_filter=device_filter)
-        elif k1 == "children" and isIterable(v1):
-            # Extract sub-group information
-            for k2, v2 in v1.items():
-                get_devices(dict_inventory=v2, search_container=search_container, devices=devices, device_filter=device_filter)
     return devices
 
 
+def index_devices(dict_inventory):
+    """
+    Build an index of hosts attached to each container in a single inventory walk.
+
+    Hosts are collected in the same order as get_devices would find them, so a lookup
+    in the index is equivalent to a get_devices call for that container.
+
+    Parameters
+    ----------
+    dict_inventory : dict
+        Inventory YAML content.
+
+    Returns
+    -------
+    dict
+        Container name mapped to a list of (hostname, host data) tuples.
+    """
+    device_index = {}
+    if not isinstance(dict_inventory, dict):
+        return device_index
+
+    for k1, v1 in iter_inventory_groups(dict_inventory):
+        # Read a leaf. Groups with empty or malformed hosts have no devices to index.
+        if isinstance(v1, dict) and isinstance(v1.get("hosts"), dict):
+            device_index.setdefault(k1, []).extend(v1["hosts"].items())
+    return device_index
+
+
 def get_containers(inventory_content, parent_container, device_filter):
     """
     get_containers - Build Container topology to build on CoudVision.
@@ -348,25 +369,131 @@ def get_containers(inventory_content, parent_container, device_filter):
     JSON
         CVP Container structure to use with cv_container.
     """
-    serialized_inventory = serialize_yaml_inventory_data(dict_inventory=inventory_content)
-    tree_dc = serialized_inventory.subtree(parent_container)
-    container_list = [tree_dc[node].tag for node in tree_dc.expand_tree()]
+    if not isinstance(inventory_content, dict):
+        raise AnsibleValidationError("Inventory file is empty or does not contain any Ansible groups")
+
+    parent_of, children_of = serialize_yaml_inventory_data(dict_inventory=inventory_content)
+    if parent_container != CVP_ROOT_CONTAINER and parent_container not in parent_of:
+        raise AnsibleValidationError(f"Group '{parent_container}' given as 'container_root' cannot be found in inventory file")
+
+    device_index = index_devices(dict_inventory=inventory_content)
     container_json = {}
-    for container in container_list:
+    # Depth-first walk of the topology below parent_container, with siblings sorted by name.
+    # Each container is read once, along with the parent it was reached from.
+    seen = set()
+    stack = [(parent_container, None)]
+    while stack:
+        container, parent = stack.pop()
+        # A container reached twice is either nested below itself or has several parents. Both cannot be built as a tree.
+        if container in seen:
+            raise AnsibleValidationError(
+                f"Group '{container}' is found more than once below the 'container_root' '{parent_container}'."
+                " Unable to build CloudVision container hierarchy."
+            )
+        seen.add(container)
+
+        children = children_of.get(container)
+        if children:
+            stack.extend((child, container) for child in sorted(children, reverse=True))
+
+        if container == CVP_ROOT_CONTAINER:
+            continue
+
         data = {}
-        if container != CVP_ROOT_CONTAINER:
-            parent = tree_dc.parent(container)
-            if container == parent_container:
-                data["parent_container"] = CVP_ROOT_CONTAINER
-            elif parent.tag != CVP_ROOT_CONTAINER:
-                if isLeaf(tree=tree_dc, nid=container):
-                    devices = get_devices(dict_inventory=inventory_content, search_container=container, devices=[], device_filter=device_filter)
-                    data["devices"] = devices
-                data["parent_container"] = parent.tag
-            container_json[container] = data
+        if container == parent_container:
+            data["parent_container"] = CVP_ROOT_CONTAINER
+        elif parent != CVP_ROOT_CONTAINER:
+            if not children:
+                data["devices"] = [
+                    dev
+                    for dev, dev_data in device_index.get(container, [])
+                    if is_in_filter(hostname_filter=device_filter, hostname=dev)
+                    and get_device_option_value(device_data_dict=dev_data, option_name="is_deployed") is not False
+                ]
+            data["parent_container"] = parent
+        container_json[container] = data
     return container_json
 
 
+def get_group_nodes(groups_nodes):
+    """
+    Map group names to the YAML nodes defining them, without constructing any Python objects.
+
+    Only group names and 'children' are walked, so hosts and vars are never visited.
+
+    Parameters
+    ----------
+    groups_nodes : list
+        YAML mapping nodes holding groups, like the inventory document or the 'children' of a group.
+
+    Returns
+    -------
+    dict
+        Group name mapped to the list of YAML mapping nodes defining the group.
+    """
+    group_nodes = {}
+    stack = list(groups_nodes)
+    while stack:
+        groups_node = stack.pop()
+        if not isinstance(groups_node, yaml.MappingNode):
+            continue
+
+        for key_node, value_node in groups_node.value:
+            if not isinstance(key_node, yaml.ScalarNode) or not isinstance(value_node, yaml.MappingNode):
+                continue
+            group_nodes.setdefault(key_node.value, []).append(value_node)
+            stack.extend(child_node for child_key_node, child_node in value_node.value if child_key_node.value == "children")
+    return group_nodes
+
+
+def load_inventory(stream, container_root):
+    """
+    Load the YAML inventory content required to build the container topology below container_root.
+
+    The whole document is composed into YAML nodes, but only the group set as container_root is
+    constructed into Python objects, which is where most of the loading time goes on large inventories.
+    The full inventory is constructed when container_root is the CloudVision root container, or when
+    a group below container_root is defined more than once, since devices are collected from every
+    definition of a group.
+
+    Parameters
+    ----------
+    stream : str or file
+        YAML inventory content or file stream.
+    container_root : str
+        Ansible group name to consider to be Root of our topology.
+
+    Returns
+    -------
+    dict
+        Inventory content, limited to {container_root: <group content>} when possible.
+        Empty if the inventory is empty or container_root cannot be found.
+    """
+    # add a constructor to return "!VAULT" for inline vault variables
+    # to avoid the parse
+    SafeLoader.add_constructor("!vault", lambda _, __: "!VAULT")
+    loader = SafeLoader(stream)
+    try:
+        document = loader.get_single_node()
+        if document is None:
+            return {}
+        if container_root == CVP_ROOT_CONTAINER:
+            return loader.construct_document(document)
+
+        group_nodes = get_group_nodes([document])
+        root_nodes = group_nodes.get(container_root)
+        if root_nodes is None:
+            return {}
+
+        children_nodes = [child_node for child_key_node, child_node in root_nodes[0].value if child_key_node.value == "children"]
+        if len(root_nodes) > 1 or any(len(group_nodes[group]) > 1 for group in get_group_nodes(children_nodes)):
+            return loader.construct_document(document)
+
+        return {container_root: loader.construct_document(root_nodes[0])}
+    finally:
+        loader.dispose()
+
+
 def main():
     """Main entry point for module execution."""
     # TODO - ansible module prefers constructor over literal
@@ -390,9 +517,6 @@ def main():
     # Build cv_container structure from YAML inventory.
     # Notice that if 'inventory' is not set, the action plugin will append the CVP_TOPOLOGY based on the loaded inventory.
     if module.params["inventory"] is not None and module.params["container_root"] is not None:
-        if not HAS_TREELIB:
-            module.fail_json(msg="Treelib lib is required for this module, when reading inventory from YAML inventory file")
-
         # "ansible-avd/examples/evpn-l3ls-cvp-deployment/inventory.yml"
         inventory_file = module.params["inventory"]
         parent_container = module.params["container_root"]
@@ -400,15 +524,15 @@ def main():
         inventory_content = ""
         with open(inventory_file, "r", encoding="utf8") as stream:
             try:
-                # add a constructor to return "!VAULT" for inline vault variables
-                # to avoid the parse
-                yaml.SafeLoader.add_constructor("!vault", lambda _, __: "!VAULT")
-                inventory_content = yaml.safe_load(stream)
+                inventory_content = load_inventory(stream, parent_container)
             except yaml.YAMLError as exc:
-                raise AnsibleValidationError("Failed to parse inventory file") from exc
-        result["cvp_topology"] = get_containers(
-            inventory_content=inventory_content, parent_container=parent_container, device_filter=module.params["device_filter"]
-        )
+                module.fail_json(msg=f"Failed to parse inventory file: {exc}")
+        try:
+            result["cvp_topology"] = get_containers(
+                inventory_content=inventory_content, parent_container=parent_container, device_filter=module.params["device_filter"]
+            )
+        except AnsibleValidationError as exc:
+            module.fail_json(msg=str(exc))
 
     # If set, build configlet topology
     if module.params["configlet_dir"] is not None:
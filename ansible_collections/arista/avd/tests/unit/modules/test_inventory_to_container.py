@@ -5,33 +5,24 @@ from __future__ import absolute_import, division, print_function
 
 __metaclass__ = type
 
-import json
 import logging
 import os
 
 import pytest
-import treelib
 import yaml
+from ansible.module_utils.errors import AnsibleValidationError
 
 from ansible_collections.arista.avd.plugins.modules.inventory_to_container import (
+    get_configlet,
     get_containers,
     get_device_option_value,
     get_devices,
+    index_devices,
     is_in_filter,
-    isIterable,
-    isLeaf,
+    load_inventory,
 )
 from ansible_collections.arista.avd.plugins.modules.inventory_to_container import serialize_yaml_inventory_data as serialize
 
-IS_ITERABLE_VALID = [
-    ("string1", "string2", "string3", "string4"),
-    {"key1": "value1", "key2": "value2", "key3": "value3"},
-    ["string1", "string2", "string3", "string4"],
-    "string1",
-]
-
-IS_ITERABLE_INVALID = [None, 0]
-
 PARENT_CONTAINER = {
     "default_parent": {
         "parent": "Tenant",
@@ -56,6 +47,64 @@ PARENT_CONTAINER = {
 
 INVENTORY_FILE = f"{os.path.dirname(os.path.realpath(__file__))}/../../inventory/inventory.yml"
 
+DUPLICATE_GROUP_INVENTORY = """
+all:
+  children:
+    DC1:
+      children:
+        DC1_LEAF1:
+          hosts:
+            DC1-LEAF1A:
+    DC2:
+      children:
+        DC1_LEAF1:
+          hosts:
+            DC1-LEAF1B:
+"""
+
+# Groups with empty or malformed hosts, which must not break the device lookup.
+EMPTY_HOSTS_INVENTORY = {
+    "all": {
+        "children": {
+            "CVP": {"hosts": None},
+            "DC1": {"hosts": "malformed", "children": {"DC1_LEAFS": {"hosts": {"leaf1": None}}}},
+        }
+    }
+}
+
+# DC1 is nested again below one of its own descendants.
+CYCLIC_INVENTORY = {"all": {"children": {"DC1": {"children": {"LEAFS": {"children": {"DC1": {"hosts": {"leaf1": None}}}}}}}}}
+
+# LEAF1 is nested below two parents within DC1.
+MULTI_PARENT_INVENTORY = {
+    "all": {
+        "children": {
+            "DC1": {
+                "children": {
+                    "L3LEAFS": {"children": {"LEAF1": {"hosts": {"leaf1": None}}}},
+                    "SERVERS": {"children": {"LEAF1": {"hosts": {"leaf2": None}}}},
+                }
+            }
+        }
+    }
+}
+
+# Hosts and vars of DC1 are aliases to anchors defined outside of DC1.
+ALIAS_INVENTORY = """
+all:
+  children:
+    COMMON:
+      vars: &common_vars
+        type: l3leaf
+      hosts: &common_hosts
+        DC1-LEAF1A:
+    DC1:
+      children:
+        DC1_LEAF1:
+          vars: *common_vars
+          hosts: *common_hosts
+"""
+
 ROOT_CONTAINER = "Tenant"
 NON_DEFAULT_PARENT_CONTAINER = "DC2"
 SEARCH_CONTAINER = "DC1_SPINES"
@@ -67,15 +116,6 @@ HOSTNAME_INVALID = "test1.bsn.com"
 HOSTNAME_FILTER_VALID = ["arista", "aristanetworks"]
 HOSTNAME_FILTER_INVALID = "aristanetworks"
 
-TREELIB = treelib.tree.Tree()
-TREELIB.create_node("Tenant", "Tenant")
-TREELIB.create_node("CVP", "CVP", parent="Tenant")
-TREELIB.create_node("DC1", "DC1", parent="Tenant")
-TREELIB.create_node("Leaf1", "Leaf1", parent="DC1")
-TREELIB.create_node("Leaf2", "Leaf2", parent="DC1")
-TREELIB_VALID_LEAF = "Leaf1"
-TREELIB_INVALID_LEAF = "DC1"
-
 
 @pytest.fixture(scope="session")
 def inventory():
@@ -107,31 +147,13 @@ class TestInventoryToContainer:
         output = is_in_filter(hostname_filter=HOSTNAME_FILTER_INVALID, hostname=HOSTNAME_VALID)
         assert output
 
-    def test_isIterable_default_iterable(self):
-        output = isIterable()
-        assert output is False
-
-    @pytest.mark.parametrize("DATA", IS_ITERABLE_VALID)
-    def test_isIterable_valid_iterable(self, DATA):
-        output = isIterable(DATA)
-        assert output
-
-    @pytest.mark.parametrize("DATA", IS_ITERABLE_INVALID)
-    def test_isIterable_invalid_iterable(self, DATA):
-        output = isIterable(DATA)
-        assert output is False
-
-    def test_isLeaf_valid_leaf(self):
-        output = isLeaf(TREELIB, TREELIB_VALID_LEAF)
-        assert output
-
-    def test_isLeaf_invalid_leaf(self):
-        output = isLeaf(TREELIB, TREELIB_INVALID_LEAF)
-        assert output is False
-
-    def test_isLeaf_none_leaf(self):
-        output = isLeaf(TREELIB, None)
-        assert output is False
+    @pytest.mark.parametrize("PREFIX, EXPECTED_NAME", [("AVD", "AVD_DC1-SPINE1"), ("none", "DC1-SPINE1")])
+    def test_get_configlet(self, PREFIX, EXPECTED_NAME, tmp_path):
+        tmp_path.joinpath("DC1-SPINE1.cfg").write_text("hostname DC1-SPINE1\n", encoding="utf8")
+        tmp_path.joinpath("DC1-SPINE2.cfg").write_text("hostname DC1-SPINE2\n", encoding="utf8")
+        tmp_path.joinpath("DC1-SPINE1.txt").write_text("ignored", encoding="utf8")
+        output = get_configlet(src_folder=str(tmp_path), prefix=PREFIX, device_filter=["SPINE1"])
+        assert output == {EXPECTED_NAME: "hostname DC1-SPINE1\n"}
 
     def test_get_device_option_value_valid(self, inventory):
         data = inventory["all"]["children"]["CVP"]["hosts"]
@@ -174,39 +196,93 @@ class TestInventoryToContainer:
         output = get_devices(inventory, search_container=SEARCH_CONTAINER, devices=[], device_filter=[GET_DEVICE_FILTER])
         assert [GET_DEVICE_FILTER in item for item in output]
 
+    def test_index_devices_empty_inventory(self):
+        output = index_devices(None)
+        assert output == {}
+
+    def test_index_devices(self, inventory):
+        output = index_devices(inventory)
+        assert [dev for dev, _ in output[SEARCH_CONTAINER]] == GET_DEVICES
+
+    @pytest.mark.parametrize("SEARCH", ["CVP", "DC1"])
+    def test_get_devices_empty_hosts(self, SEARCH):
+        output = get_devices(EMPTY_HOSTS_INVENTORY, search_container=SEARCH, devices=[])
+        assert output == []
+
+    def test_index_devices_empty_hosts(self):
+        output = index_devices(EMPTY_HOSTS_INVENTORY)
+        assert output == {"DC1_LEAFS": [("leaf1", None)]}
+
+    def test_get_containers_empty_hosts(self):
+        output = get_containers(EMPTY_HOSTS_INVENTORY, parent_container="DC1", device_filter=["all"])
+        assert output == {
+            "DC1": {"parent_container": "Tenant"},
+            "DC1_LEAFS": {"devices": ["leaf1"], "parent_container": "DC1"},
+        }
+
     @pytest.mark.parametrize("DATA", [None])
     def test_serialize_empty_inventory(self, DATA):
         output = serialize(DATA)
         assert output is None
 
     def test_serialize_valid_inventory(self, inventory):
-        output = serialize(inventory)
-        assert isinstance(output, treelib.tree.Tree)
-        tree_dict = json.loads(output.to_json())
-        assert (list(tree_dict.keys()))[0] == ROOT_CONTAINER
-
-    @pytest.mark.parametrize("DATA", PARENT_CONTAINER.values(), ids=PARENT_CONTAINER.keys())
-    def test_serialize_parent_container(self, DATA, inventory):
-        output = serialize(inventory, parent_container=DATA["parent"])
-        assert isinstance(output, treelib.tree.Tree)
-        tree_dict = json.loads(output.to_json())
-        assert (list(tree_dict.keys()))[0] == ROOT_CONTAINER
-
-    def test_serialize_none_parent_container_with_tree_topology(self, inventory):
-        tree = treelib.tree.Tree()
-        output = serialize(inventory, tree_topology=tree)
-        assert isinstance(output, treelib.tree.Tree)
-        tree_dict = json.loads(output.to_json())
-        assert (list(tree_dict.keys()))[0] == "all"
-
-    def test_serialize_non_default_parent_container_with_tree_topology(self, inventory):
-        tree = treelib.tree.Tree()
-        tree.create_node(NON_DEFAULT_PARENT_CONTAINER, NON_DEFAULT_PARENT_CONTAINER)
-        output = serialize(inventory, parent_container=NON_DEFAULT_PARENT_CONTAINER, tree_topology=tree)
-        tree_dict = json.loads(output.to_json())
-        assert (list(tree_dict.keys()))[0] == NON_DEFAULT_PARENT_CONTAINER
+        parent_of, children_of = serialize(inventory)
+        assert children_of[ROOT_CONTAINER] == ["all"]
+        assert parent_of["all"] == ROOT_CONTAINER
+        assert parent_of[SEARCH_CONTAINER] == "DC1_FABRIC"
+        assert SEARCH_CONTAINER not in children_of
 
     @pytest.mark.parametrize("DATA", PARENT_CONTAINER.values(), ids=PARENT_CONTAINER.keys())
     def test_get_containers(self, DATA, inventory):
         output = get_containers(inventory, parent_container=DATA["parent"], device_filter=["all"])
         assert output == DATA["expected_output"]
+
+    @pytest.mark.parametrize("DATA", [None, "", ["all"]])
+    def test_get_containers_invalid_inventory(self, DATA):
+        with pytest.raises(AnsibleValidationError):
+            get_containers(DATA, parent_container=SEARCH_CONTAINER, device_filter=["all"])
+
+    @pytest.mark.parametrize("DATA", [CYCLIC_INVENTORY, MULTI_PARENT_INVENTORY], ids=["cyclic", "multi_parent"])
+    def test_get_containers_duplicate_container(self, DATA):
+        with pytest.raises(AnsibleValidationError, match="found more than once"):
+            get_containers(DATA, parent_container="DC1", device_filter=["all"])
+
+    def test_get_containers_invalid_parent(self, inventory):
+        with pytest.raises(AnsibleValidationError):
+            get_containers(inventory, parent_container=NON_DEFAULT_PARENT_CONTAINER, device_filter=["all"])
+
+    @pytest.mark.parametrize("DATA", PARENT_CONTAINER.values(), ids=PARENT_CONTAINER.keys())
+    def test_load_inventory(self, DATA):
+        with open(INVENTORY_FILE, "r", encoding="utf8") as stream:
+            output = load_inventory(stream, DATA["parent"])
+        if DATA["parent"] != ROOT_CONTAINER:
+            assert list(output.keys()) == [DATA["parent"]]
+        assert get_containers(output, parent_container=DATA["parent"], device_filter=["all"]) == DATA["expected_output"]
+
+    def test_load_inventory_duplicate_group(self):
+        output = load_inventory(DUPLICATE_GROUP_INVENTORY, "DC1")
+        assert list(output.keys()) == ["all"]
+        assert get_containers(output, parent_container="DC1", device_filter=["all"])["DC1_LEAF1"]["devices"] == ["DC1-LEAF1A", "DC1-LEAF1B"]
+
+    def test_load_inventory_alias_outside_container_root(self):
+        output = load_inventory(ALIAS_INVENTORY, "DC1")
+        assert output == {"DC1": {"children": {"DC1_LEAF1": {"vars": {"type": "l3leaf"}, "hosts": {"DC1-LEAF1A": None}}}}}
+        assert get_containers(output, parent_container="DC1", device_filter=["all"]) == {
+            "DC1": {"parent_container": "Tenant"},
+            "DC1_LEAF1": {"devices": ["DC1-LEAF1A"], "parent_container": "DC1"},
+        }
+
+    @pytest.mark.parametrize("PARENT", [ROOT_CONTAINER, SEARCH_CONTAINER])
+    def test_load_inventory_empty_inventory(self, PARENT):
+        output = load_inventory("", PARENT)
+        assert output == {}
+
+    def test_load_inventory_empty_inventory_get_containers(self):
+        output = load_inventory("", SEARCH_CONTAINER)
+        with pytest.raises(AnsibleValidationError, match="cannot be found"):
+            get_containers(output, parent_container=SEARCH_CONTAINER, device_filter=["all"])
+
+    def test_load_inventory_invalid_parent(self):
+        with open(INVENTORY_FILE, "r", encoding="utf8") as stream:
+            output = load_inventory(stream, NON_DEFAULT_PARENT_CONTAINER)
+        assert output == {}
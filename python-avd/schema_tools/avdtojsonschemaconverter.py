@@ -3,8 +3,42 @@
 # that can be found in the LICENSE file.
 from __future__ import annotations
 
+from functools import lru_cache
+
 from .key_to_display_name import key_to_display_name
 
+# Map of AVD Schema type to JSON Schema type.
+TYPE_MAP = {
+    "str": "string",
+    "int": "integer",
+    "bool": "boolean",
+    "list": "array",
+    "dict": "object",
+}
+
+# Map of AVD Schema str format to JSON Schema format. None means the format is not supported by JSON Schema.
+FORMAT_MAP = {
+    "ipv4": "ipv4",
+    "ipv4_cidr": None,
+    "ipv6": "ipv6",
+    "ipv6_cidr": None,
+    "ip": None,
+    "cidr": None,
+    "mac": None,
+}
+
+# JSON Schema patternProperties permitting any key starting with underscore.
+# The same dict is shared by every converted schema element, since the output is only serialized.
+UNDERSCORE_PATTERN_PROPERTIES = {"^_.+$": {}}
+
+
+@lru_cache(maxsize=None)
+def cached_key_to_display_name(key: str) -> str:
+    """
+    Cached version of key_to_display_name, since the same key names are repeated many times across the schema.
+    """
+    return key_to_display_name(key)
+
 
 def get_deprecation(schema: dict) -> tuple[str, str]:
     """
@@ -32,22 +66,23 @@ def get_deprecation(schema: dict) -> tuple[str, str]:
         state_verb = "is"
         state = "deprecated"
 
-    output = [f"This key {state_verb} {state}."]
+    # Each optional sentence is either empty or starts with a space, so the message is built with a single f-string.
+    removal = new_key_text = url_text = ""
 
     if (remove_in_version := deprecation.get("remove_in_version")) is not None:
-        output.append(f"Support {removed_verb} removed in AVD version {remove_in_version}.")
+        removal = f" Support {removed_verb} removed in AVD version {remove_in_version}."
     elif (remove_after_date := deprecation.get("remove_after_date")) is not None:
-        output.append(f"Support {removed_verb} removed in the first major AVD version released after {remove_after_date}.")
+        removal = f" Support {removed_verb} removed in the first major AVD version released after {remove_after_date}."
     elif removed:
-        output.append(f"Support {removed_verb} removed in AVD.")
+        removal = f" Support {removed_verb} removed in AVD."
 
     if (new_key := deprecation.get("new_key")) is not None:
-        output.append(f"Use <samp>{new_key}</samp> instead.")
+        new_key_text = f" Use <samp>{new_key}</samp> instead."
 
     if (url := deprecation.get("url")) is not None:
-        output.append(f"See [here]({url}) for details.")
+        url_text = f" See [here]({url}) for details."
 
-    return state, " ".join(output)
+    return state, f"This key {state_verb} {state}.{removal}{new_key_text}{url_text}"
 
 
 class AvdToJsonSchemaConverter:
@@ -68,64 +103,84 @@ class AvdToJsonSchemaConverter:
     """
 
     def __init__(self):
-        self.converters = {
-            "display_name": self.convert_display_name,
-            "description": self.convert_description,
-            "type": self.convert_type,
-            "max": self.convert_max,
-            "min": self.convert_min,
-            "valid_values": self.convert_valid_values,
-            "format": self.convert_format,
-            "max_length": self.convert_max_length,
-            "min_length": self.convert_min_length,
-            "pattern": self.convert_pattern,
-            "default": self.convert_default,
-            "items": self.convert_items,
-            "keys": self.convert_keys,
-            # "dynamic_keys": self.convert_dynamic_keys,
-        }
+        # Deprecation details per schema element, keyed by id() of the schema dict.
+        # The schema dict is stored along with the result to keep the id from being reused.
+        self._deprecations: dict[int, tuple[dict, tuple[str, str]]] = {}
+        # Nested schema elements waiting to be converted by convert_schema.
+        # Each entry is (schema, output, key used for auto-generated title, primary_key to mark as required).
+        self._pending: list[tuple[dict, dict, str | None, str | None]] = []
+
+    def __get_deprecation(self, schema: dict) -> tuple[str, str]:
+        """
+        Cached version of get_deprecation, since it is needed both when converting keys and descriptions.
+        """
+        if (cached := self._deprecations.get(id(schema))) is None:
+            cached = self._deprecations[id(schema)] = (schema, get_deprecation(schema))
+        return cached[1]
 
     def convert_schema(self, schema: dict) -> dict:
+        """
+        Convert the given AVD Schema element and all nested schema elements to JSON Schema.
+
+        The converters for "items" and "keys" do not recurse. They return empty output dicts for the nested
+        schema elements and queue them in self._pending, so every element is converted in place in the final
+        output without Python recursion.
+        The queue is reset on every call, so nothing left over from a failed conversion gets processed.
+        """
+        converters = self.CONVERTERS
+        self._pending = pending = []
         output = {}
-        for word in schema:
-            if word not in self.converters:
-                # Ignore unsupported keys
-                continue
+        pending.append((schema, output, None, None))
+        while pending:
+            subschema, suboutput, key, primary_key = pending.pop()
+
+            for word, value in subschema.items():
+                if (converter := converters.get(word)) is None:
+                    # Ignore unsupported keys
+                    continue
+
+                suboutput.update(converter(self, value, subschema))
 
-            output.update(self.converters[word](schema[word], schema))
+            # Add an auto-generated title in case one is not set
+            if key is not None and "title" not in suboutput:
+                suboutput["title"] = cached_key_to_display_name(str(key))
+
+            if primary_key is not None:
+                if (required := suboutput.get("required")) is None:
+                    suboutput["required"] = required = []
+                if primary_key not in required:
+                    required.append(primary_key)
 
         return output
 
     def convert_type(self, type: str, _) -> dict:
-        TYPE_MAP = {
-            "str": "string",
-            "int": "integer",
-            "bool": "boolean",
-            "list": "array",
-            "dict": "object",
-        }
         return {"type": TYPE_MAP[type]}
 
     def convert_keys(self, keys: dict, parent_schema: dict) -> dict:
+        """
+        Convert "keys" to JSON Schema "properties".
+
+        The returned properties are empty placeholder dicts. They are only filled when the queued
+        nested schema elements are converted, so this must be called from convert_schema.
+        """
         return self.__convert_keys(keys, parent_schema, "properties")
 
     def __convert_keys(self, keys: dict, parent_schema: dict, output_key: str, ignore_required: str = False) -> dict:
         """
         Reusable function to convert keys, pattern_keys, $defs
         output_key is set to either "properties", "patternProperties" or "$defs"
+        The converted keys are empty placeholder dicts, filled by convert_schema from self._pending.
         """
-        output = {output_key: {}}
+        properties = {}
+        output = {output_key: properties}
         required = []
         for key, subschema in keys.items():
-            if "deprecation" in subschema and get_deprecation(subschema)[0] == "removed":
+            if "deprecation" in subschema and self.__get_deprecation(subschema)[0] == "removed":
                 # Skip key if marked as removed in the AVD schema
                 continue
 
-            output[output_key][key] = self.convert_schema(subschema)
-
-            # Add an auto-generated title in case one is not set
-            if "title" not in output[output_key][key]:
-                output[output_key][key]["title"] = key_to_display_name(str(key))
+            properties[key] = converted = {}
+            self._pending.append((subschema, converted, key, None))
 
             if not ignore_required and subschema.get("required") is True:
                 required.append(key)
@@ -133,12 +188,16 @@ class AvdToJsonSchemaConverter:
         if required:
             output["required"] = required
 
-        # output["unevaluatedProperties"] = parent_schema.get("allow_other_keys", False)
-        output["additionalProperties"] = parent_schema.get("allow_other_keys", False)
+        allow_other_keys = parent_schema.get("allow_other_keys", False)
+        # output["unevaluatedProperties"] = allow_other_keys
+        output["additionalProperties"] = allow_other_keys
 
         # Always permit keys starting with underscore
-        if not parent_schema.get("allow_other_keys", False):
-            output.setdefault("patternProperties", {})["^_.+$"] = {}
+        if not allow_other_keys:
+            if output_key == "patternProperties":
+                properties.update(UNDERSCORE_PATTERN_PROPERTIES)
+            else:
+                output["patternProperties"] = UNDERSCORE_PATTERN_PROPERTIES
 
         return output
 
@@ -152,15 +211,6 @@ class AvdToJsonSchemaConverter:
         return {"enum": valid_values}
 
     def convert_format(self, format: str, _) -> dict:
-        FORMAT_MAP = {
-            "ipv4": "ipv4",
-            "ipv4_cidr": None,
-            "ipv6": "ipv6",
-            "ipv6_cidr": None,
-            "ip": None,
-            "cidr": None,
-            "mac": None,
-        }
         if (newformat := FORMAT_MAP[format]) is None:
             return {}
 
@@ -189,21 +239,26 @@ class AvdToJsonSchemaConverter:
         return {"default": default}
 
     def convert_items(self, items: dict, parent_schema: dict) -> dict:
-        output = {
-            "items": self.convert_schema(items),
-        }
-        if (primary_key := parent_schema.get("primary_key")) and items.get("type") == "dict":
-            output["items"].setdefault("required", [])
-            if primary_key not in output["items"]["required"]:
-                output["items"]["required"].append(primary_key)
-        return output
+        """
+        Convert "items" to JSON Schema "items".
+
+        The returned "items" is an empty placeholder dict. It is only filled when the queued
+        items schema is converted, so this must be called from convert_schema.
+        """
+        converted_items = {}
+        primary_key = None
+        if items.get("type") == "dict":
+            # The primary_key of list items is added to the required keys once the items are converted.
+            primary_key = parent_schema.get("primary_key") or None
+        self._pending.append((items, converted_items, None, primary_key))
+        return {"items": converted_items}
 
     def convert_display_name(self, display_name: str, _) -> dict:
         return {"title": display_name}
 
     def convert_description(self, description: str, parent_schema: dict) -> dict:
         if "deprecation" in parent_schema:
-            _, deprecation_text = get_deprecation(parent_schema)
+            _, deprecation_text = self.__get_deprecation(parent_schema)
             if deprecation_text is not None:
                 return {
                     "description": f"{description}\n{deprecation_text}",
@@ -211,3 +266,23 @@ class AvdToJsonSchemaConverter:
                 }
 
         return {"description": description}
+
+    # Map of AVD Schema keyword to the converter function.
+    # Defined after the converters so the functions can be referenced directly,
+    # saving a getattr and bound method creation for every keyword converted.
+    CONVERTERS = {
+        "display_name": convert_display_name,
+        "description": convert_description,
+        "type": convert_type,
+        "max": convert_max,
+        "min": convert_min,
+        "valid_values": convert_valid_values,
+        "format": convert_format,
+        "max_length": convert_max_length,
+        "min_length": convert_min_length,
+        "pattern": convert_pattern,
+        "default": convert_default,
+        "items": convert_items,
+        "keys": convert_keys,
+        # "dynamic_keys": convert_dynamic_keys,
+    }
@@ -0,0 +1,95 @@
+# Copyright (c) 2023-2024 Arista Networks, Inc.
+# Use of this source code is governed by the Apache License 2.0
+# that can be found in the LICENSE file.
+import json
+from pathlib import Path
+from sys import path
+
+import pytest
+
+# Override global path to load schema from source instead of any installed version.
+path.insert(0, str(Path(__file__).parents[2]))
+
+from schema_tools.avdtojsonschemaconverter import AvdToJsonSchemaConverter  # noqa: E402
+
+AVD_SCHEMA = {
+    "type": "dict",
+    "keys": {
+        "name": {"type": "str", "required": True, "display_name": "Device Name", "description": "Name of the device."},
+        "old_name": {
+            "type": "str",
+            "description": "Old name of the device.",
+            "deprecation": {"warning": True, "new_key": "name", "remove_in_version": "6.0.0"},
+        },
+        "removed_key": {"type": "str", "deprecation": {"warning": True, "removed": True}},
+        "mgmt_ip": {"type": "str", "format": "ipv4_cidr", "documentation_options": {"table": "management"}},
+        "vlan_interfaces": {
+            "type": "list",
+            "primary_key": "vlan_id",
+            "min_length": 1,
+            "items": {
+                "type": "dict",
+                "keys": {
+                    "vlan_id": {"type": "int", "min": 1, "max": 4094},
+                    "ip": {"type": "str", "format": "ipv4"},
+                },
+            },
+        },
+        "custom_options": {"type": "dict", "allow_other_keys": True, "keys": {"mtu": {"type": "int", "default": 1500}}},
+    },
+}
+
+EXPECTED_JSONSCHEMA = {
+    "type": "object",
+    "properties": {
+        "name": {"type": "string", "title": "Device Name", "description": "Name of the device."},
+        "old_name": {
+            "type": "string",
+            "description": (
+                "Old name of the device.\nThis key is deprecated. Support will be removed in AVD version 6.0.0. Use <samp>name</samp> instead."
+            ),
+            "deprecated": True,
+            "title": "Old Name",
+        },
+        "mgmt_ip": {"type": "string", "title": "Management IP"},
+        "vlan_interfaces": {
+            "type": "array",
+            "minItems": 1,
+            "items": {
+                "type": "object",
+                "properties": {
+                    "vlan_id": {"type": "integer", "minimum": 1, "maximum": 4094, "title": "VLAN ID"},
+                    "ip": {"type": "string", "format": "ipv4", "title": "IP"},
+                },
+                "additionalProperties": False,
+                "patternProperties": {"^_.+$": {}},
+                "required": ["vlan_id"],
+            },
+            "title": "VLAN Interfaces",
+        },
+        "custom_options": {
+            "type": "object",
+            "properties": {"mtu": {"type": "integer", "default": 1500, "title": "MTU"}},
+            "additionalProperties": True,
+            "title": "Custom Options",
+        },
+    },
+    "required": ["name"],
+    "additionalProperties": False,
+    "patternProperties": {"^_.+$": {}},
+}
+
+
+def test_convert_schema() -> None:
+    output = AvdToJsonSchemaConverter().convert_schema(AVD_SCHEMA)
+    # Compare the serialized output to also verify the order of keys in the generated JSON Schema.
+    assert json.dumps(output) == json.dumps(EXPECTED_JSONSCHEMA)
+
+
+def test_convert_schema_after_failed_conversion() -> None:
+    converter = AvdToJsonSchemaConverter()
+    with pytest.raises(KeyError):
+        converter.convert_schema({"type": "dict", "keys": {"invalid": {"type": "invalid"}, "name": {"type": "str"}}})
+
+    output = converter.convert_schema(AVD_SCHEMA)
+    assert json.dumps(output) == json.dumps(EXPECTED_JSONSCHEMA)